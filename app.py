@@ -2,9 +2,13 @@
 Small Business Inventory Management System
 A Flask web application for managing inventory, orders, and sales predictions.
 """
-import json
 import os
+import queue
+import threading
+import time
 from flask import Flask, flash, render_template, request, redirect, url_for
+from markupsafe import escape
+import orjson
 import pandas as pd
 import sqlite3
 import traceback
@@ -19,68 +23,325 @@ Config.init_app(app)
 # Database path from configuration
 DB_PATH = app.config['DATABASE_PATH']
 
+# SQL statements used by the routes. Keeping them as module-level constants
+# means every request passes the same strings, which is what each pooled
+# connection's statement cache is keyed on.
+SQL_SELECT_PRODUCTS = "SELECT product_id, name, price, stock_level FROM products ORDER BY product_id LIMIT ? OFFSET ?"
+SQL_COUNT_PRODUCTS = "SELECT count(*) FROM products"
+SQL_SEARCH_PRODUCTS = '''
+    SELECT product_id, name, price, stock_level FROM products
+    WHERE instr(lower(name), lower(?1)) > 0 OR CAST(product_id AS TEXT) = ?1
+    ORDER BY product_id LIMIT ?2 OFFSET ?3
+'''
+SQL_COUNT_SEARCH_PRODUCTS = "SELECT count(*) FROM products WHERE instr(lower(name), lower(?1)) > 0 OR CAST(product_id AS TEXT) = ?1"
+SQL_PRODUCT_EXISTS = "SELECT 1 FROM products WHERE product_id = ? LIMIT 1"
+SQL_PRODUCT_NAME_EXISTS = "SELECT 1 FROM products WHERE name = ? LIMIT 1"
+SQL_SELECT_PRODUCT_NAME = "SELECT name FROM products WHERE product_id = ?"
+SQL_INSERT_PRODUCT = "INSERT INTO products (product_id, name, price, stock_level) VALUES (?, ?, ?, ?)"
+SQL_INSERT_NEW_PRODUCT = "INSERT INTO products (name, price, stock_level) VALUES (?, ?, ?)"
+SQL_INSERT_MISSING_PRODUCT = "INSERT OR IGNORE INTO products (product_id, name, price, stock_level) VALUES (?, ?, ?, 0)"
+SQL_UPDATE_PRODUCT = "UPDATE products SET name = ?, price = ?, stock_level = ? WHERE product_id = ?"
+SQL_DEDUCT_STOCK = "UPDATE products SET stock_level = stock_level - ? WHERE product_id = ?"
+SQL_DELETE_PRODUCT = "DELETE FROM products WHERE product_id = ?"
+SQL_DELETE_ALL_PRODUCTS = "DELETE FROM products"
+
+SQL_SELECT_ORDERS = '''
+    SELECT order_id, order_date, customer_email, total_amount, status, line_items
+    FROM orders ORDER BY order_id LIMIT ? OFFSET ?
+'''
+SQL_COUNT_ORDERS = "SELECT count(*) FROM orders"
+SQL_SELECT_ORDER_IDS = "SELECT order_id FROM orders"
+SQL_SELECT_PENDING_ORDERS = "SELECT order_id, line_items FROM orders WHERE status != 'completed'"
+SQL_ORDER_EXISTS = "SELECT 1 FROM orders WHERE order_id = ? LIMIT 1"
+SQL_SELECT_ORDERS_LIKE = "SELECT order_id, line_items FROM orders WHERE line_items LIKE ?"
+SQL_INSERT_ORDER = '''
+    INSERT INTO orders (order_id, order_date, customer_email, total_amount, status, line_items)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_FORM_ORDER = '''
+    INSERT INTO orders (product_id, quantity, order_date, customer_name, customer_address)
+    VALUES (?, ?, ?, ?, ?)
+'''
+SQL_UPDATE_ORDER = '''
+    UPDATE orders
+    SET product_id = ?, quantity = ?, order_date = ?, customer_name = ?, customer_address = ?
+    WHERE order_id = ?
+'''
+SQL_COMPLETE_ORDER = "UPDATE orders SET status = 'completed' WHERE order_id = ?"
+SQL_DELETE_ORDER = "DELETE FROM orders WHERE order_id = ?"
+SQL_DELETE_PRODUCT_ORDERS = '''
+    DELETE FROM orders
+    WHERE order_id IN (
+        SELECT o.order_id
+        FROM orders o, json_each(CASE WHEN json_valid(o.line_items) THEN o.line_items ELSE '[]' END) j
+        WHERE CASE WHEN j.type = 'object' THEN json_extract(j.value, '$.product_id') END = ?
+    )
+'''
+SQL_DELETE_ALL_ORDERS = "DELETE FROM orders"
+
+# Hot statements run once with placeholder arguments when a pooled connection
+# is opened, so they are already compiled when the first request arrives.
+# Write statements are run inside a transaction that is rolled back.
+READ_WARMUP = (
+    (SQL_SELECT_PRODUCTS, (0, 0)),
+    (SQL_COUNT_PRODUCTS, ()),
+    (SQL_SEARCH_PRODUCTS, ('', 0, 0)),
+    (SQL_COUNT_SEARCH_PRODUCTS, ('',)),
+    (SQL_SELECT_ORDERS, (0, 0)),
+    (SQL_COUNT_ORDERS, ()),
+)
+WRITE_WARMUP = (
+    (SQL_PRODUCT_EXISTS, (-1,)),
+    (SQL_PRODUCT_NAME_EXISTS, ('',)),
+    (SQL_SELECT_PRODUCT_NAME, (-1,)),
+    (SQL_SELECT_ORDER_IDS, ()),
+    (SQL_SELECT_PENDING_ORDERS, ()),
+    (SQL_ORDER_EXISTS, (-1,)),
+    (SQL_INSERT_PRODUCT, (-1, '', 0, 0)),
+    (SQL_INSERT_MISSING_PRODUCT, (-1, '', 0)),
+    (SQL_UPDATE_PRODUCT, ('', 0, 0, -1)),
+    (SQL_DEDUCT_STOCK, (0, -1)),
+    (SQL_DELETE_PRODUCT, (-1,)),
+    (SQL_INSERT_ORDER, (-1, '', '', 0, '', '[]')),
+    (SQL_COMPLETE_ORDER, (-1,)),
+    (SQL_DELETE_ORDER, (-1,)),
+)
+
+# Per-connection settings applied when a pooled connection is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",  # ~20MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+)
+
+class SQLitePool:
+    """
+    Bounded, thread-safe pool of open SQLite connections.
+    Connections are handed out and returned instead of being closed,
+    so the page cache survives between requests.
+    """
+
+    def __init__(self, db_path, size, readonly=False, warmup=()):
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._connect(db_path, readonly, warmup))
+
+    @staticmethod
+    def _connect(db_path, readonly, warmup):
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+
+        # Compile the hot statements into this connection's statement cache
+        try:
+            conn.execute("BEGIN")
+            for sql, params in warmup:
+                try:
+                    conn.execute(sql, params).close()
+                except sqlite3.Error as e:
+                    # e.g. tables not created yet, or a placeholder key that already exists
+                    print(f"Skipping statement warm-up: {e}")
+        finally:
+            conn.rollback()
+        return conn
+
+    def get(self):
+        return self._connections.get()
+
+    def put(self, conn):
+        self._connections.put(conn)
+
+# SQLite allows a single writer at a time, so writes share one connection
+# while read-only routes draw from a larger pool.
+writer_pool = SQLitePool(DB_PATH, 1, warmup=WRITE_WARMUP)
+reader_pool = SQLitePool(DB_PATH, app.config['DB_POOL_SIZE'], readonly=True, warmup=READ_WARMUP)
+
 @contextmanager
-def get_db_connection():
+def get_db_connection(readonly=False):
     """
-    Context manager for database connections.
-    Ensures proper connection handling and automatic cleanup.
+    Context manager for pooled database connections.
+    Write connections open an immediate transaction which the caller commits;
+    anything left uncommitted is rolled back before the connection is returned.
     """
-    conn = None
+    pool = reader_pool if readonly else writer_pool
+    conn = pool.get()
     try:
-        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        if not readonly:
+            conn.execute("BEGIN IMMEDIATE")
         yield conn
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
-        if conn:
-            conn.rollback()
         raise
     finally:
-        if conn:
-            conn.close()
+        if conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
 
-@app.route('/')
-def index():
+def table_is_strict(table):
+    """Return whether a table was created STRICT (SQLite 3.37+)."""
+    try:
+        with get_db_connection(readonly=True) as conn:
+            row = conn.execute("SELECT strict FROM pragma_table_list WHERE name = ?", (table,)).fetchone()
+    except sqlite3.OperationalError:
+        return False  # SQLite too old to report it
+    return bool(row and row[0])
+
+# Databases created before the STRICT schema keep their loose column types
+# (CREATE TABLE IF NOT EXISTS does not alter them), so form values are only
+# left for SQLite to validate when the products table is known to be STRICT.
+PRODUCTS_TABLE_STRICT = table_is_strict('products')
+
+def coerce_product_values(price, stock_level):
     """
-    Display the main inventory dashboard with products and orders.
-    Shows color-coded stock levels and provides search/sort functionality.
+    Convert form values for the products table.
+    Raises ValueError if a loose table would otherwise store non-numeric text.
     """
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-
-        # Fetch product data
-        cursor.execute("SELECT * FROM products")
-        product_data = cursor.fetchall()
+    if PRODUCTS_TABLE_STRICT:
+        return price, stock_level
+    return float(price), int(stock_level)
 
-        # Process product data
-        if product_data:
-            product_df = pd.DataFrame(product_data, columns=['product_id', 'name', 'price', 'stock_level'])
+def get_row_style(stock_level):
+    """Return the table row class for a product's stock level."""
+    try:
+        stock_level = float(stock_level)
+    except (TypeError, ValueError):
+        return "table-danger"  # Unreadable stock level
+    if stock_level <= 0:
+        return "table-danger"  # Red for negative stock
+    elif stock_level < 100:
+        return "table-warning"  # Yellow for stock < 100
+    return "table-success"  # green if stock is sufficient
+
+def escape_line_items(line_items):
+    """Re-serialize an order's line_items JSON, escaped for an HTML attribute."""
+    try:
+        # Parse the line_items into a Python object
+        items = orjson.loads(line_items)
+    except orjson.JSONDecodeError:
+        items = []
 
-            # Add a style column for stock level based on conditions
-            def get_row_style(stock_level):
-                if stock_level <= 0:
-                    return "table-danger"  # Red for negative stock
-                elif stock_level < 100:
-                    return "table-warning"  # Yellow for stock < 100
-                return "table-success"  # green if stock is sufficient
+    return escape(orjson.dumps(items).decode())
 
-            product_df['row_style'] = product_df['stock_level'].apply(get_row_style)
-            product_table = product_df.to_dict(orient='records')  # Convert to list of dicts
+def is_valid_json(value):
+    """Return whether a line_items value parses as JSON."""
+    try:
+        orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return False
+    return True
+
+def format_ids(ids, limit=10):
+    """Join IDs for a flash message, truncating long lists."""
+    # pandas reads an ID column as float when any value in the chunk is non-integral
+    shown = ', '.join(str(int(i)) if isinstance(i, float) and i.is_integer() else str(i) for i in ids[:limit])
+    if len(ids) > limit:
+        shown += f" and {len(ids) - limit} more"
+    return shown
+
+# Rendered query results for the read-only pages, keyed by table and then by
+# page number (or 'count'). Each entry is (timestamp, rows); mutation routes
+# call invalidate().
+_cache = {'products': {}, 'orders': {}}
+_cache_generation = {'products': 0, 'orders': 0}
+_cache_lock = threading.Lock()
+
+def invalidate(*tables):
+    """Drop cached results for the given tables after they are modified."""
+    with _cache_lock:
+        for table in tables:
+            _cache[table] = {}
+            _cache_generation[table] += 1
+
+def cached_query(table, key, load):
+    """
+    Return a cached result for a table, calling load() to refresh it on a miss.
+    Entries also expire after QUERY_CACHE_TTL seconds as a safety net.
+    """
+    with _cache_lock:
+        entry = _cache[table].get(key)
+        if entry is not None and time.monotonic() - entry[0] < app.config['QUERY_CACHE_TTL']:
+            return entry[1]
+        generation = _cache_generation[table]
+
+    rows = load()
+
+    with _cache_lock:
+        # Skip storing if the table was invalidated while loading
+        if _cache_generation[table] == generation:
+            _cache[table][key] = (time.monotonic(), rows)
+    return rows
+
+def count_rows(count_sql, params=()):
+    """Return the row count from a SELECT count(*) statement."""
+    with get_db_connection(readonly=True) as conn:
+        return conn.execute(count_sql, params).fetchone()[0]
+
+def load_product_table(limit, offset, search=''):
+    """
+    Fetch a page of products with a style for each stock level.
+    A search term matches part of a product name or an exact product ID.
+    """
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        if search:
+            cursor.execute(SQL_SEARCH_PRODUCTS, (search, limit, offset))
         else:
-            product_table = []  # Empty list if no products
+            cursor.execute(SQL_SELECT_PRODUCTS, (limit, offset))
+        return [dict(row, row_style=get_row_style(row['stock_level'])) for row in cursor]
 
-        # Fetch order data
-        cursor.execute("SELECT * FROM orders")
-        order_data = cursor.fetchall()
+def load_order_table(limit, offset):
+    """Fetch a page of orders with their line items escaped for the templates."""
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(SQL_SELECT_ORDERS, (limit, offset))
+        return [
+            dict(row, line_items=escape_line_items(row['line_items']))  # Escape JSON string
+            for row in cursor
+        ]
+
+def paginate(table, count_sql, load_page, search=''):
+    """
+    Return (rows, page, total_pages) for the page requested in ?page=.
+    Out-of-range page numbers are clamped to the first or last page.
+    Search results bypass the cache, which would otherwise grow with every term.
+    """
+    page_size = app.config['PAGE_SIZE']
+    if search:
+        total = count_rows(count_sql, (search,))
+    else:
+        total = cached_query(table, 'count', lambda: count_rows(count_sql))
+    total_pages = max(1, -(-total // page_size))
+    page = min(max(request.args.get('page', 1, type=int), 1), total_pages)
+
+    offset = (page - 1) * page_size
+    if search:
+        rows = load_page(page_size, offset, search)
+    else:
+        rows = cached_query(table, page, lambda: load_page(page_size, offset))
+    return rows, page, total_pages
 
-        # Process order data
-        if order_data:
-            order_df = pd.DataFrame(order_data, columns=['order_id', 'product_id', 'quantity', 'order_date', 'customer_name', 'customer_address'])
-            order_table = order_df.to_dict(orient='records')  # Convert to list of dicts
-        else:
-            order_table = []  # Empty list if no orders
+@app.route('/')
+def index():
+    """
+    Display the main inventory dashboard one page of products at a time.
+    Shows color-coded stock levels. ?q= searches the whole inventory;
+    sorting by column happens in the browser on the current page.
+    """
+    search = request.args.get('q', '').strip()
+    count_sql = SQL_COUNT_SEARCH_PRODUCTS if search else SQL_COUNT_PRODUCTS
+    product_table, page, total_pages = paginate('products', count_sql, load_product_table, search)
 
-        # Pass the processed data to the template
-        return render_template('index.html', product_table=product_table, order_table=order_table)
+    # Pass the processed data to the template
+    return render_template('index.html', product_table=product_table, page=page,
+                           total_pages=total_pages, search=search)
 
 
 
@@ -88,36 +349,11 @@ def index():
 def orders_page():
     """
     Display the orders management page.
-    Shows all orders with their line items and status.
+    Shows one page of orders with their line items and status.
     """
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-        cursor.execute("SELECT order_id, order_date, customer_email, total_amount, status, line_items FROM orders")
-        order_data = cursor.fetchall()
-
-        order_table = []
-        for row in order_data:
-            try:
-                # Parse the line_items into a Python object
-                line_items = json.loads(row[5])
-            except json.JSONDecodeError:
-                line_items = []
-
-            # Escape the JSON string for HTML
-            escaped_line_items = json.dumps(line_items).replace("'", "&#39;").replace('"', '&quot;')
-
-            order_table.append({
-                'order_id': row[0],
-                'order_date': row[1],
-                'customer_email': row[2],
-                'total_amount': row[3],
-                'status': row[4],
-                'line_items': escaped_line_items  # Escape JSON string
-            })
-
-            return render_template('orders.html', order_table=order_table)
+        order_table, page, total_pages = paginate('orders', SQL_COUNT_ORDERS, load_order_table)
+        return render_template('orders.html', order_table=order_table, page=page, total_pages=total_pages)
 
     except Exception as e:
         print(f"Error in orders_page route: {e}")
@@ -144,36 +380,36 @@ def upload_inventory():
 
         # Detect file type based on extension
         file_extension = os.path.splitext(file.filename)[1].lower()
-
-        if file_extension == '.csv':
-            try:
-                # Read the CSV file into a DataFrame
-                data = pd.read_csv(file)
-            except Exception as e:
-                return f"Error reading CSV file: {str(e)}", 500
-        else:
+        if file_extension != '.csv':
             return "Unsupported file format! Please upload a CSV file.", 400
 
-        # Edit names in the DataFrame
-        data.columns = data.columns.str.strip().str.lower()
-
-        # Ensure the required columns exist
         required_columns = {'productid', 'productname', 'price', 'stock'}
-        if not required_columns.issubset(data.columns):
-            print("Detected columns:", data.columns.tolist())  # Debugging
-            return f"File must contain the following columns: {', '.join(required_columns)}", 400
-
-        # Insert data into the database
-        cursor.execute("DELETE FROM products")
-
-        # Insert new data into the table
-        for _, row in data.iterrows():
-            cursor.execute('''
-                INSERT INTO products (product_id, name, price, stock_level)
-                VALUES (?, ?, ?, ?)
-            ''', (row['productid'], row['productname'], row['price'], row['stock']))
+        try:
+            # Stream the CSV in chunks so memory use does not grow with file size
+            for chunk_number, data in enumerate(pd.read_csv(file, chunksize=app.config['CSV_CHUNK_SIZE'])):
+                # Edit names in the DataFrame
+                data.columns = data.columns.str.strip().str.lower()
+
+                if chunk_number == 0:
+                    # Ensure the required columns exist
+                    if not required_columns.issubset(data.columns):
+                        print("Detected columns:", data.columns.tolist())  # Debugging
+                        return f"File must contain the following columns: {', '.join(required_columns)}", 400
+
+                    # Replace the existing inventory
+                    cursor.execute(SQL_DELETE_ALL_PRODUCTS)
+
+                # Insert the chunk into the table in a single batch
+                rows = data[['productid', 'productname', 'price', 'stock']].itertuples(index=False, name=None)
+                try:
+                    cursor.executemany(SQL_INSERT_PRODUCT, rows)
+                except sqlite3.IntegrityError as e:
+                    return f"Invalid inventory data: {e}", 400
+        except ValueError as e:  # Raised by pandas for unreadable or malformed CSV data
+            return f"Error reading CSV file: {str(e)}", 500
 
         conn.commit()
+        invalidate('products')
         flash("Inventory uploaded successfully!", "success")
         return redirect(url_for('index'))
 
@@ -197,48 +433,72 @@ def upload_orders():
         if file_extension != '.csv':
             return "Unsupported file format! Please upload a CSV file.", 400
 
-        try:
-            data = pd.read_csv(file)
-        except Exception as e:
-            return f"Error reading CSV file: {str(e)}", 500
+        columns = ['order_id', 'order_date', 'customer_email', 'total_amount', 'status', 'line_items']
+        required_columns = set(columns)
 
-        required_columns = {'order_id', 'order_date', 'customer_email', 'total_amount', 'status', 'line_items'}
-        if not required_columns.issubset(data.columns.str.lower()):
-            return f"File must contain the following columns: {', '.join(required_columns)}", 400
+        # Load existing order IDs once instead of probing per row
+        cursor.execute(SQL_SELECT_ORDER_IDS)
+        existing_ids = {order_id for (order_id,) in cursor.fetchall()}
 
-        for _, row in data.iterrows():
-            # Validate row data
-            if not all([row['order_id'], row['order_date'], row['customer_email'], row['total_amount'], row['status'], row['line_items']]):
-                flash(f"Missing required fields in order ID {row['order_id']}. Skipping.", "danger")
-                continue
+        # Order IDs skipped for each reason, reported once after the upload
+        missing_ids, invalid_value_ids, invalid_json_ids, duplicate_ids = [], [], [], []
 
-            try:
-                json.loads(row['line_items'])  # Validate JSON
-            except json.JSONDecodeError:
-                flash(f"Invalid JSON in line_items for order ID {row['order_id']}. Skipping.", "danger")
-                continue
+        def flash_skipped():
+            if missing_ids:
+                flash(f"Missing required fields in order IDs {format_ids(missing_ids)}. Skipped.", "danger")
+            if invalid_value_ids:
+                flash(f"Invalid order ID or total amount in order IDs {format_ids(invalid_value_ids)}. Skipped.", "danger")
+            if invalid_json_ids:
+                flash(f"Invalid JSON in line_items for order IDs {format_ids(invalid_json_ids)}. Skipped.", "danger")
+            if duplicate_ids:
+                flash(f"Order IDs {format_ids(duplicate_ids)} already exist. Skipped.", "warning")
 
-            # Check for duplicate order_id
-            cursor.execute("SELECT 1 FROM orders WHERE order_id = ?", (row['order_id'],))
-            if cursor.fetchone():
-                flash(f"Order ID {row['order_id']} already exists. Skipping.", "warning")
-                continue
+        try:
+            # Stream the CSV in chunks so memory use does not grow with file size
+            for chunk_number, data in enumerate(pd.read_csv(file, chunksize=app.config['CSV_CHUNK_SIZE'])):
+                if chunk_number == 0 and not required_columns.issubset(data.columns.str.lower()):
+                    return f"File must contain the following columns: {', '.join(required_columns)}", 400
+
+                data = data[columns]
+
+                # Validate row data
+                missing = data.isna().any(axis=1) | ~data.astype(bool).all(axis=1)
+                missing_ids.extend(data.loc[missing, 'order_id'])
+                data = data[~missing]
+
+                # Skip values the orders table's types and CHECK constraints would reject
+                order_ids = pd.to_numeric(data['order_id'], errors='coerce')
+                total_amounts = pd.to_numeric(data['total_amount'], errors='coerce')
+                invalid_value = order_ids.isna() | (order_ids % 1 != 0) | total_amounts.isna() | (total_amounts < 0)
+                invalid_value_ids.extend(data.loc[invalid_value, 'order_id'])
+                # One non-numeric ID makes pandas read the whole column as text, so
+                # compare and insert the integer IDs rather than the raw values
+                data = data[~invalid_value].assign(order_id=order_ids[~invalid_value].astype('int64'))
+
+                valid_json = data['line_items'].map(is_valid_json)
+                invalid_json_ids.extend(data.loc[~valid_json, 'order_id'])
+                data = data[valid_json]
+
+                # Check for duplicate order_id, including repeats within the file
+                duplicate = data['order_id'].isin(existing_ids) | data['order_id'].duplicated()
+                duplicate_ids.extend(data.loc[duplicate, 'order_id'])
+                data = data[~duplicate]
+                existing_ids.update(data['order_id'])
+
+                # Insert the chunk's valid orders in one batch
+                try:
+                    cursor.executemany(SQL_INSERT_ORDER, data.itertuples(index=False, name=None))
+                except sqlite3.Error as e:
+                    flash_skipped()
+                    flash(f"Error inserting orders: {e}", "danger")
+                    return redirect(url_for('orders_page'))
+        except ValueError as e:  # Raised by pandas for unreadable or malformed CSV data
+            return f"Error reading CSV file: {str(e)}", 500
 
-            # Insert the order
-            try:
-                cursor.execute('''
-                    INSERT INTO orders (order_id, order_date, customer_email, total_amount, status, line_items)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (row['order_id'], row['order_date'], row['customer_email'],
-                      row['total_amount'], row['status'], row['line_items']))
-            except sqlite3.IntegrityError as e:
-                flash(f"Integrity error for order ID {row['order_id']}: {e}", "danger")
-                continue
-            except Exception as e:
-                flash(f"Error inserting order ID {row['order_id']}: {e}", "danger")
-                continue
+        flash_skipped()
 
         conn.commit()
+        invalidate('orders')
         flash("Orders uploaded successfully!", "success")
         return redirect(url_for('orders_page'))
 
@@ -252,44 +512,68 @@ def process_orders():
     with get_db_connection() as conn:
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM orders WHERE status != 'completed'")
+        cursor.execute(SQL_SELECT_PENDING_ORDERS)
         orders = cursor.fetchall()
 
-        for order in orders:
-            order_id, order_date, customer_email, total_amount, status, line_items = order
+        # Aggregate ordered quantities per product across all pending orders
+        product_totals = {}
+        processed_order_ids = []
+        for order_id, line_items in orders:
             try:
-                items = json.loads(line_items)  # Safe JSON parsing
-            except json.JSONDecodeError:
+                items = orjson.loads(line_items)  # Safe JSON parsing
+            except orjson.JSONDecodeError:
                 flash(f"Invalid JSON in order {order_id}. Skipping.", "danger")
                 continue
 
-            for item in items:
-                product_id = item['product_id']
-                quantity = item['quantity']
-
-                # Deduct stock (even if stock goes negative)
-                cursor.execute('''
-                    UPDATE products
-                    SET stock_level = stock_level - ?
-                    WHERE product_id = ?
-                ''', (quantity, product_id))
-
-                # If the product does not exist, add it to the products table
-                cursor.execute('SELECT stock_level FROM products WHERE product_id = ?', (product_id,))
-                if cursor.fetchone() is None:
-                    cursor.execute('''
-                        INSERT INTO products (product_id, name, price, stock_level)
-                        VALUES (?, ?, ?, ?)
-                    ''', (product_id, item['name'], item['price'], -quantity))
-
-            # Mark the order as completed
-            cursor.execute('''
-                UPDATE orders
-                SET status = 'completed'
-                WHERE order_id = ?
-            ''', (order_id,))
+            try:
+                # Quantities may arrive as JSON strings, e.g. "2"
+                quantities = [(item['product_id'], int(item['quantity']), item) for item in items]
+            except (KeyError, TypeError, ValueError):
+                flash(f"Invalid line items in order {order_id}. Skipping.", "danger")
+                continue
+
+            for product_id, quantity, item in quantities:
+                totals = product_totals.setdefault(product_id, {'quantity': 0, 'name': None, 'price': None})
+                totals['quantity'] += quantity
+
+                # Name and price are only needed if the product has to be created
+                if totals['name'] is None:
+                    totals['name'] = item.get('name')
+                if totals['price'] is None:
+                    totals['price'] = item.get('price')
+
+            processed_order_ids.append((order_id,))
+
+        # Add any products that do not exist yet, starting from zero stock.
+        # Names and prices the products table would reject are left out here.
+        new_products = []
+        for product_id, totals in product_totals.items():
+            try:
+                price = float(totals['price'])
+            except (TypeError, ValueError):
+                continue
+            if isinstance(totals['name'], str) and totals['name'] and price >= 0:
+                new_products.append((product_id, totals['name'], price))
+        cursor.executemany(SQL_INSERT_MISSING_PRODUCT, new_products)
+
+        # Products still missing from the inventory could not be created
+        untracked_ids = []
+        for product_id in product_totals:
+            cursor.execute(SQL_PRODUCT_EXISTS, (product_id,))
+            if cursor.fetchone() is None:
+                untracked_ids.append(product_id)
+        if untracked_ids:
+            flash(f"Products {format_ids(untracked_ids)} are not in the inventory and their orders "
+                  "lack a valid name or price. Stock was not deducted for them.", "warning")
+
+        # Deduct stock (even if stock goes negative)
+        cursor.executemany(SQL_DEDUCT_STOCK, [(totals['quantity'], product_id) for product_id, totals in product_totals.items()])
+
+        # Mark the orders as completed
+        cursor.executemany(SQL_COMPLETE_ORDER, processed_order_ids)
 
         conn.commit()
+        invalidate('products', 'orders')
         flash("Orders processed successfully!", "success")
         return redirect(url_for('orders_page'))
 
@@ -301,8 +585,9 @@ def clear_orders():
     """Clear all orders from the database."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM orders")
+        cursor.execute(SQL_DELETE_ALL_ORDERS)
         conn.commit()
+        invalidate('orders')
         flash("Orders have been cleared successfully!", "success")
         return redirect(url_for('orders_page'))
 
@@ -322,28 +607,24 @@ def add_product():
             flash("All fields are required!", "danger")
             return redirect(url_for('index'))
 
-        try:
-            price = float(price)
-            stock_level = int(stock_level)
-        except ValueError:
-            flash("Invalid price or stock level format!", "danger")
-            return redirect(url_for('index'))
-
         # Check if product already exists
-        cursor.execute("SELECT * FROM products WHERE name = ?", (product_name,))
+        cursor.execute(SQL_PRODUCT_NAME_EXISTS, (product_name,))
         existing_product = cursor.fetchone()
 
         if existing_product:
             flash(f"Product '{product_name}' already exists!", "warning")
             return redirect(url_for('index'))
 
-        # Insert new product
-        cursor.execute('''
-            INSERT INTO products (name, price, stock_level)
-            VALUES (?, ?, ?)
-        ''', (product_name, price, stock_level))
+        # Insert new product; the table's column types and CHECK constraints validate the values
+        try:
+            price, stock_level = coerce_product_values(price, stock_level)
+            cursor.execute(SQL_INSERT_NEW_PRODUCT, (product_name, price, stock_level))
+        except (ValueError, sqlite3.IntegrityError):
+            flash("Invalid price or stock level format!", "danger")
+            return redirect(url_for('index'))
 
         conn.commit()
+        invalidate('products')
         flash(f"Product '{product_name}' added successfully!", "success")
         return redirect(url_for('index'))
 
@@ -368,7 +649,7 @@ def remove_product():
             return redirect(url_for('index'))
 
         # Check if product exists
-        cursor.execute("SELECT name FROM products WHERE product_id = ?", (product_id,))
+        cursor.execute(SQL_SELECT_PRODUCT_NAME, (product_id,))
         product = cursor.fetchone()
 
         if not product:
@@ -376,23 +657,31 @@ def remove_product():
             return redirect(url_for('index'))
 
         # Remove the product
-        cursor.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+        cursor.execute(SQL_DELETE_PRODUCT, (product_id,))
         
-        cursor.execute("SELECT order_id, line_items FROM orders")
-        orders = cursor.fetchall()
-        
-        for order_id, line_items in orders:
-            try:
-                # Safe JSON parsing
-                items = json.loads(line_items)
-                
-                # Check if any item in the order matches the product
-                if any(item.get('product_id') == product_id for item in items):
-                    cursor.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Error processing order {order_id}: {e}")
+        # Remove orders containing the product, matching line items inside SQLite
+        try:
+            cursor.execute(SQL_DELETE_PRODUCT_ORDERS, (product_id,))
+        except sqlite3.OperationalError as e:
+            # Only an SQLite build without JSON support falls back to the slow path
+            if 'no such' not in str(e):
+                raise
+
+            # Shortlist by text, then check in Python
+            cursor.execute(SQL_SELECT_ORDERS_LIKE, (f"%{product_id}%",))
+            for order_id, line_items in cursor.fetchall():
+                try:
+                    # Safe JSON parsing
+                    items = orjson.loads(line_items)
+
+                    # Check if any item in the order matches the product
+                    if any(item.get('product_id') == product_id for item in items):
+                        cursor.execute(SQL_DELETE_ORDER, (order_id,))
+                except (orjson.JSONDecodeError, Exception) as e:
+                    print(f"Error processing order {order_id}: {e}")
 
         conn.commit()
+        invalidate('products', 'orders')
         flash(f"Product '{product[0]}' and related orders removed successfully!", "success")
         return redirect(url_for('index'))
 
@@ -415,28 +704,28 @@ def update_product():
 
         try:
             product_id = int(product_id)
-            price = float(price)
-            stock_level = int(stock_level)
         except ValueError:
             flash("Invalid input format!", "danger")
             return redirect(url_for('index'))
 
         # Check if product exists
-        cursor.execute("SELECT name FROM products WHERE product_id = ?", (product_id,))
-        product = cursor.fetchone()
+        cursor.execute(SQL_PRODUCT_EXISTS, (product_id,))
+        existing_product = cursor.fetchone()
 
-        if not product:
+        if not existing_product:
             flash(f"No product found with ID {product_id}!", "warning")
             return redirect(url_for('index'))
 
-        # Update the product
-        cursor.execute('''
-            UPDATE products
-            SET name = ?, price = ?, stock_level = ?
-            WHERE product_id = ?
-        ''', (product_name, price, stock_level, product_id))
+        # Update the product; the table's column types and CHECK constraints validate the values
+        try:
+            price, stock_level = coerce_product_values(price, stock_level)
+            cursor.execute(SQL_UPDATE_PRODUCT, (product_name, price, stock_level, product_id))
+        except (ValueError, sqlite3.IntegrityError):
+            flash("Invalid input format!", "danger")
+            return redirect(url_for('index'))
 
         conn.commit()
+        invalidate('products')
         flash(f"Product '{product_name}' updated successfully!", "success")
         return redirect(url_for('index'))
 
@@ -468,7 +757,7 @@ def update_order():
             return redirect(url_for('orders_page'))
 
         # Check if the order exists
-        cursor.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+        cursor.execute(SQL_ORDER_EXISTS, (order_id,))
         existing_order = cursor.fetchone()
 
         if not existing_order:
@@ -476,13 +765,10 @@ def update_order():
             return redirect(url_for('orders_page'))
 
         # Update the order
-        cursor.execute('''
-            UPDATE orders
-            SET product_id = ?, quantity = ?, order_date = ?, customer_name = ?, customer_address = ?
-            WHERE order_id = ?
-        ''', (product_id, quantity, order_date, customer_name, customer_address, order_id))
+        cursor.execute(SQL_UPDATE_ORDER, (product_id, quantity, order_date, customer_name, customer_address, order_id))
 
         conn.commit()
+        invalidate('orders')
         flash(f"Order ID {order_id} updated successfully!", "success")
         return redirect(url_for('orders_page'))
 
@@ -507,7 +793,7 @@ def remove_order():
             return redirect(url_for('orders_page'))
 
         # Check if the order exists
-        cursor.execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+        cursor.execute(SQL_ORDER_EXISTS, (order_id,))
         existing_order = cursor.fetchone()
 
         if not existing_order:
@@ -515,8 +801,9 @@ def remove_order():
             return redirect(url_for('orders_page'))
 
         # Remove the order
-        cursor.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+        cursor.execute(SQL_DELETE_ORDER, (order_id,))
         conn.commit()
+        invalidate('orders')
 
         flash(f"Order ID {order_id} removed successfully!", "success")
         return redirect(url_for('orders_page'))
@@ -547,7 +834,7 @@ def add_order():
             return redirect(url_for('orders_page'))
 
         # Check if the product exists
-        cursor.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
+        cursor.execute(SQL_PRODUCT_EXISTS, (product_id,))
         existing_product = cursor.fetchone()
 
         if not existing_product:
@@ -555,12 +842,10 @@ def add_order():
             return redirect(url_for('orders_page'))
 
         # Insert the new order
-        cursor.execute('''
-            INSERT INTO orders (product_id, quantity, order_date, customer_name, customer_address)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (product_id, quantity, order_date, customer_name, customer_address))
+        cursor.execute(SQL_INSERT_FORM_ORDER, (product_id, quantity, order_date, customer_name, customer_address))
 
         conn.commit()
+        invalidate('orders')
         flash("Order added successfully!", "success")
         return redirect(url_for('orders_page'))
             
@@ -581,15 +866,9 @@ def sales_predictions():
             flash('No selected file', 'error')
             return redirect(request.url)
         
-        # Create temp directory if it doesn't exist
-        os.makedirs('temp', exist_ok=True)
-        
-        # Save temporarily
-        file_path = os.path.join('temp', file.filename)
-        file.save(file_path)
-        
         try:
-            predictions = main(file_path)
+            # Read the upload straight from the request stream
+            predictions = main(file.stream)
             return render_template('sales_predictions.html', predictions=predictions)
         except Exception as e:
             # Print full traceback for debugging
@@ -18,11 +18,15 @@ class Config:
     # Database configuration
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATABASE_PATH = os.getenv('DATABASE_PATH', os.path.join(BASE_DIR, 'data', 'inventory.db'))
+    DB_POOL_SIZE = max(1, int(os.getenv('DB_POOL_SIZE', os.cpu_count() or 4)))  # Reader connections kept open
+    QUERY_CACHE_TTL = 5  # Seconds cached product/order listings stay valid without a write
+    PAGE_SIZE = 50  # Rows shown per page on the inventory and orders tables
     
     # Upload configuration
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploaded_files')
     TEMP_FOLDER = os.path.join(BASE_DIR, 'temp')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))  # 64MB max file size
+    CSV_CHUNK_SIZE = 50_000  # Rows read per chunk when streaming uploaded CSV files
     ALLOWED_EXTENSIONS = {'csv'}
     
     # Model configuration
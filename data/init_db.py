@@ -8,7 +8,7 @@ import os
 def init_database():
     """
     Initialize the database with required tables.
-    Creates products and orders tables if they don't exist.
+    Creates products and orders tables and their indexes if they don't exist.
     """
     # Get the directory of this script
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,14 +18,29 @@ def init_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # Database-level settings. page_size and auto_vacuum only take effect
+    # before the first table is created; journal_mode=WAL is persistent and
+    # stored in the database file. synchronous, foreign_keys and cache_size
+    # are per-connection, so the application re-applies them to every
+    # pooled connection (see CONNECTION_PRAGMAS in app.py).
+    cursor.execute("PRAGMA page_size=4096")
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    
+    # STRICT tables (SQLite 3.37+) reject values that cannot be stored as the
+    # declared column type, so the routes leave type validation to the database.
+    # Stock levels may go negative when orders exceed inventory.
+    
     # Create products table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS products (
         product_id INTEGER PRIMARY KEY,
         name TEXT NOT NULL,
-        price REAL NOT NULL,
+        price REAL NOT NULL CHECK(price >= 0),
         stock_level INTEGER NOT NULL
-    )
+    ) STRICT
     ''')
     
     # Create orders table
@@ -34,12 +49,16 @@ def init_database():
         order_id INTEGER PRIMARY KEY AUTOINCREMENT,
         order_date TEXT NOT NULL,
         customer_email TEXT NOT NULL,
-        total_amount REAL NOT NULL,
+        total_amount REAL NOT NULL CHECK(total_amount >= 0),
         status TEXT NOT NULL,
         line_items TEXT NOT NULL
-    )
+    ) STRICT
     ''')
     
+    # Secondary indexes for the lookups done by process_orders and add_product
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)")
+    
     conn.commit()
     conn.close()
     